@@ -1,107 +1,220 @@
-import collections
-if not hasattr(collections, "Mapping"):
-    import collections.abc
-    collections.Mapping = collections.abc.Mapping
-
-import logging
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
-from experta import KnowledgeEngine, Fact, Rule, MATCH
-
-# Инициализация приложения FastAPI
-app = FastAPI()
-
-# Настройка логирования
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
-logger = logging.getLogger(__name__)
-
-# Данные о растениях
-plants = [
-    {"name": "Роза", "color": "красный", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Либерти", "color": "зеленый", "size": "средний", "type": "кустарник", "link": "https://elovpark.ru/product/%d1%85%d0%be%d1%81%d1%82%d0%b0-%d0%bb%d0%b8%d0%b1%d0%b5%d1%80%d1%82%d0%b8/"},
-    {"name": "Вербейник", "color": "желтый", "size": "средний", "type": "цветок", "link": "https://elovpark.ru/product/%d0%b2%d0%b5%d1%80%d0%b1%d0%b5%d0%b9%d0%bd%d0%b8%d0%ba-%d1%82%d0%be%d1%87%d0%b5%d1%87%d0%bd%d1%8b%d0%b9/"},
-    {"name": "Тюльпан", "color": "желтый", "size": "средний", "type": "цветок", "link": "-"},
-    {"name": "Барбарис", "color": "красный", "size": "большой", "type": "кустарник", "link": "https://elovpark.ru/product/%d0%b1%d0%b0%d1%80%d0%b1%d0%b0%d1%80%d0%b8%d1%81-%d1%82%d1%83%d0%bd%d0%b1%d0%b5%d1%80%d0%b3%d0%b0-%d0%b0%d1%82%d1%80%d0%be%d0%bf%d1%83%d1%80%d0%bf%d1%83%d1%80%d0%b5%d0%b0/"},
-    {"name": "Бадан", "color": "розовый", "size": "маленький", "type": "цветок", "link": "https://elovpark.ru/product/%d0%b1%d0%b0%d0%b4%d0%b0%d0%bd-%d1%82%d0%be%d0%bb%d1%81%d1%82%d0%be%d0%bb%d0%b8%d%d0%b8%d1%81%d1%82%d0%bd%d1%8b%d0%b9/"},
-    {"name": "Кактус", "color": "зеленый", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Орхидея", "color": "белый", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Медуница", "color": "синий", "size": "маленький", "type": "цветок", "link": "https://elovpark.ru/product/%d0%bc%d0%b5%d0%b4%d1%83%d0%bd%d0%b8%d1%86%d0%b0-%d1%81%d0%b0%d1%85%d0%b0%d1%80%d0%bd%d0%b0%d1%8f-%d0%bc%d0%b8%d1%81%d1%81%d0%b8%d1%81-%d0%bc%d1%83%d0%bd/"},
-    {"name": "Пион", "color": "красный", "size": "маленький", "type": "цветок", "link": "https://elovpark.ru/product/%d0%bf%d0%b8%d0%be%d0%bd-%d1%82%d0%be%d0%bd%d0%ba%d0%be%d0%bb%d0%b8%d1%81%d1%82%d0%bd%d1%8b%d0%b9/"},
-    {"name": "Ирис Вайт Ледис", "color": "белый", "size": "средний", "type": "цветок", "link": "https://elovpark.ru/product/%d0%b8%d1%80%d0%b8%d1%81-%d0%b2%d0%b0%d0%b9%d1%82-%d0%bb%d0%b5%d0%b4%d0%b8%d1%81/"},
-    {"name": "Астра", "color": "красный", "size": "средний", "type": "цветок", "link": "-"},
-    {"name": "Бегония", "color": "розовый", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Каллы", "color": "белый", "size": "средний", "type": "цветок", "link": "-"},
-    {"name": "Пальма", "color": "зеленый", "size": "большой", "type": "дерево", "link": "-"},
-    {"name": "Нарцисс", "color": "желтый", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Фиалка", "color": "синий", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Гладиолус", "color": "красный", "size": "большой", "type": "цветок", "link": "-"},
-    {"name": "Мирт", "color": "зеленый", "size": "маленький", "type": "цветок", "link": "-"},
-    {"name": "Цинерария", "color": "синий", "size": "средний", "type": "цветок", "link": "-"},
-    {"name": "Клематис", "color": "белый", "size": "большой", "type": "цветок", "link": "-"},
-    {"name": "Лаванда", "color": "синий", "size": "средний", "type": "цветок", "link": "-"}
-]
-
-class PlantQuery(BaseModel):
-    color: str
-    size: str
-    type: str
-
-class PlantFact(Fact):
-    """Факт, описывающий растение."""
-    color = ""
-    size = ""
-    type = ""
-    name = ""
-    link = ""
-
-class PlantEngine(KnowledgeEngine):
-    def __init__(self, query):
-        super().__init__()
-        self.query = query
-        self.results = []
-
-    def add_facts(self):
-        """Добавляем факты о растениях."""
-        for plant in plants:
-            self.declare(PlantFact(
-                name=plant["name"],
-                color=plant["color"],
-                size=plant["size"],
-                type=plant["type"],
-                link=plant["link"]
-            ))
-
-    @Rule(PlantFact(color=MATCH.color, size=MATCH.size, type=MATCH.type, name=MATCH.name, link=MATCH.link))
-    def match_plant(self, color, size, type, name, link):
-        """Правило для нахождения подходящего растения."""
-        if (color == self.query.color and
-                size == self.query.size and
-                type == self.query.type):
-            self.results.append({
-                "color": color,
-                "size": size,
-                "type": type,
-                "name": name,
-                "link": link
-            })
-
-@app.post("/find_plants")
-async def find_plants(query: PlantQuery, request: Request):
-    """Эндпоинт для поиска растений по параметрам с использованием experta."""
-    # Логирование входящего запроса (полное тело запроса)
-    request_body = await request.body()
-    logger.info(f"Получен запрос от {request.client.host}: {request_body.decode()}")
-
-    # Инициализация экспертной системы
-    plant_engine = PlantEngine(query)
-
-    # Добавление фактов и запуск правил
-    plant_engine.reset()
-    plant_engine.add_facts()
-    plant_engine.run()
-
-    # Формирование ответа
-    if not plant_engine.results:
-        raise HTTPException(status_code=404, detail="Растения не найдены")
-
-    return {"results": plant_engine.results}
+import functools
+import logging
+import logging.config
+import sys
+from collections import namedtuple
+from contextlib import asynccontextmanager
+import msgspec
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+
+# Вся предвычислительная работа привязана к жизненному циклу приложения:
+# выполняется ровно один раз, до того как сервер начнёт принимать трафик
+@asynccontextmanager
+async def lifespan(app):
+    _build_indexes()
+    yield
+
+# Инициализация приложения FastAPI (ответы сериализуются через orjson)
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Настройка логирования: явная конфигурация вместо basicConfig, которая молча
+# превращается в no-op, если корневой логгер уже настроен (например, при --reload)
+logging.config.dictConfig({
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s - %(message)s"}
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "default"}
+    },
+    "root": {"level": "INFO", "handlers": ["console"]}
+})
+logger = logging.getLogger(__name__)
+
+# Данные о растениях
+plants = [
+    {"name": "Роза", "color": "красный", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Либерти", "color": "зеленый", "size": "средний", "type": "кустарник", "link": "https://elovpark.ru/product/%d1%85%d0%be%d1%81%d1%82%d0%b0-%d0%bb%d0%b8%d0%b1%d0%b5%d1%80%d1%82%d0%b8/"},
+    {"name": "Вербейник", "color": "желтый", "size": "средний", "type": "цветок", "link": "https://elovpark.ru/product/%d0%b2%d0%b5%d1%80%d0%b1%d0%b5%d0%b9%d0%bd%d0%b8%d0%ba-%d1%82%d0%be%d1%87%d0%b5%d1%87%d0%bd%d1%8b%d0%b9/"},
+    {"name": "Тюльпан", "color": "желтый", "size": "средний", "type": "цветок", "link": "-"},
+    {"name": "Барбарис", "color": "красный", "size": "большой", "type": "кустарник", "link": "https://elovpark.ru/product/%d0%b1%d0%b0%d1%80%d0%b1%d0%b0%d1%80%d0%b8%d1%81-%d1%82%d1%83%d0%bd%d0%b1%d0%b5%d1%80%d0%b3%d0%b0-%d0%b0%d1%82%d1%80%d0%be%d0%bf%d1%83%d1%80%d0%bf%d1%83%d1%80%d0%b5%d0%b0/"},
+    {"name": "Бадан", "color": "розовый", "size": "маленький", "type": "цветок", "link": "https://elovpark.ru/product/%d0%b1%d0%b0%d0%b4%d0%b0%d0%bd-%d1%82%d0%be%d0%bb%d1%81%d1%82%d0%be%d0%bb%d0%b8%d%d0%b8%d1%81%d1%82%d0%bd%d1%8b%d0%b9/"},
+    {"name": "Кактус", "color": "зеленый", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Орхидея", "color": "белый", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Медуница", "color": "синий", "size": "маленький", "type": "цветок", "link": "https://elovpark.ru/product/%d0%bc%d0%b5%d0%b4%d1%83%d0%bd%d0%b8%d1%86%d0%b0-%d1%81%d0%b0%d1%85%d0%b0%d1%80%d0%bd%d0%b0%d1%8f-%d0%bc%d0%b8%d1%81%d1%81%d0%b8%d1%81-%d0%bc%d1%83%d0%bd/"},
+    {"name": "Пион", "color": "красный", "size": "маленький", "type": "цветок", "link": "https://elovpark.ru/product/%d0%bf%d0%b8%d0%be%d0%bd-%d1%82%d0%be%d0%bd%d0%ba%d0%be%d0%bb%d0%b8%d1%81%d1%82%d0%bd%d1%8b%d0%b9/"},
+    {"name": "Ирис Вайт Ледис", "color": "белый", "size": "средний", "type": "цветок", "link": "https://elovpark.ru/product/%d0%b8%d1%80%d0%b8%d1%81-%d0%b2%d0%b0%d0%b9%d1%82-%d0%bb%d0%b5%d0%b4%d0%b8%d1%81/"},
+    {"name": "Астра", "color": "красный", "size": "средний", "type": "цветок", "link": "-"},
+    {"name": "Бегония", "color": "розовый", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Каллы", "color": "белый", "size": "средний", "type": "цветок", "link": "-"},
+    {"name": "Пальма", "color": "зеленый", "size": "большой", "type": "дерево", "link": "-"},
+    {"name": "Нарцисс", "color": "желтый", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Фиалка", "color": "синий", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Гладиолус", "color": "красный", "size": "большой", "type": "цветок", "link": "-"},
+    {"name": "Мирт", "color": "зеленый", "size": "маленький", "type": "цветок", "link": "-"},
+    {"name": "Цинерария", "color": "синий", "size": "средний", "type": "цветок", "link": "-"},
+    {"name": "Клематис", "color": "белый", "size": "большой", "type": "цветок", "link": "-"},
+    {"name": "Лаванда", "color": "синий", "size": "средний", "type": "цветок", "link": "-"}
+]
+
+# Каталог замораживается как кортеж именованных кортежей: меньше памяти на запись,
+# доступ к полям по смещению вместо поиска по хешу ключа
+Plant = namedtuple("Plant", "name color size type link")
+PLANTS = tuple(Plant(**p) for p in plants)
+del plants
+
+# Структуры поиска; заполняются в _build_indexes() при старте приложения
+PLANT_INDEX = {}
+COLOR_CODE = {}
+SIZE_CODE = {}
+TYPE_CODE = {}
+PLANT_RESPONSE_BYTES = {}
+PLANT_TRIE = {}
+
+def _pack_key(color_code, size_code, type_code):
+    return (color_code << 16) | (size_code << 8) | type_code
+
+def _build_indexes():
+    """Построение всех структур поиска до приёма трафика.
+
+    Индекс (цвет, размер, тип) -> кортеж растений; коды категорий; готовые
+    байты JSON-ответов; префиксное дерево для частичных запросов.
+    """
+    # Строки категорий интернируются, чтобы сравнение ключей сводилось к проверке идентичности
+    groups = {}
+    for plant in PLANTS:
+        key = (sys.intern(plant.color), sys.intern(plant.size), sys.intern(plant.type))
+        groups.setdefault(key, []).append({
+            "color": plant.color,
+            "size": plant.size,
+            "type": plant.type,
+            "name": plant.name,
+            "link": plant.link
+        })
+    PLANT_INDEX.update((key, tuple(group)) for key, group in groups.items())
+
+    # Кодирование категорий малыми целыми: словарь закрытый, поэтому ключ ответа
+    # упаковывается в одно число - один хеш int вместо хеширования трёх строк
+    for color, size, type_ in PLANT_INDEX:
+        COLOR_CODE.setdefault(color, len(COLOR_CODE))
+        SIZE_CODE.setdefault(size, len(SIZE_CODE))
+        TYPE_CODE.setdefault(type_, len(TYPE_CODE))
+
+    # Готовые байты JSON-ответа для каждого ключа: сериализация по разу на ключ,
+    # а не на каждый запрос; и префиксное дерево цвет -> размер -> тип, листья
+    # которого разделяются с индексом
+    for (color, size, type_), group in PLANT_INDEX.items():
+        packed = _pack_key(COLOR_CODE[color], SIZE_CODE[size], TYPE_CODE[type_])
+        PLANT_RESPONSE_BYTES[packed] = orjson.dumps({"results": group})
+        PLANT_TRIE.setdefault(color, {}).setdefault(size, {})[type_] = group
+
+class PlantQuery(msgspec.Struct):
+    color: str | None = None
+    size: str | None = None
+    type: str | None = None
+
+class PlantBatchQuery(msgspec.Struct):
+    queries: list[PlantQuery]
+
+# Декодеры собираются один раз: разбор и валидация тела запроса за один проход на C
+_decode_query = msgspec.json.Decoder(PlantQuery).decode
+_decode_batch = msgspec.json.Decoder(PlantBatchQuery).decode
+
+@functools.lru_cache(maxsize=128)
+def _search(color, size, type_):
+    """Поиск по индексу с мемоизацией: комбинаций запроса немного, повторные
+    запросы возвращают уже готовый кортеж без обращения к индексу."""
+    return PLANT_INDEX.get((sys.intern(color), sys.intern(size), sys.intern(type_)), ())
+
+def _iter_levels(level, key):
+    """Уровень дерева: при заданном ключе - один узел, при None - все узлы."""
+    if key is not None:
+        node = level.get(key)
+        return (node,) if node is not None else ()
+    return level.values()
+
+@functools.lru_cache(maxsize=256)
+def _partial_search(color, size, type_):
+    """Обход префиксного дерева; None в поле означает «любое значение»."""
+    results = []
+    for by_size in _iter_levels(PLANT_TRIE, color):
+        for by_type in _iter_levels(by_size, size):
+            for group in _iter_levels(by_type, type_):
+                results.extend(group)
+    return tuple(results)
+
+def _resolve(query):
+    """Выбор пути поиска: точный запрос идёт в плоский индекс, частичный - в дерево."""
+    if None in (query.color, query.size, query.type):
+        return _partial_search(query.color, query.size, query.type)
+    return _search(query.color, query.size, query.type)
+
+@app.post("/find_plants")
+async def find_plants(request: Request):
+    """Эндпоинт для поиска растений по параметрам через предвычисленный индекс."""
+    # Разбор тела запроса через msgspec вместо pydantic
+    try:
+        query = _decode_query(await request.body())
+    except msgspec.ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except msgspec.DecodeError:
+        raise HTTPException(status_code=400, detail="Некорректный JSON")
+
+    logger.debug("Запрос find_plants от %s: %s", request.client.host, query)
+
+    # Частичный запрос (заданы не все поля) обходит префиксное дерево
+    if None in (query.color, query.size, query.type):
+        results = _partial_search(query.color, query.size, query.type)
+        if not results:
+            raise HTTPException(status_code=404, detail="Растения не найдены")
+        return {"results": results}
+
+    # Перевод строк в коды; слово вне словаря - сразу 404, до обращения к индексу
+    color_code = COLOR_CODE.get(query.color)
+    size_code = SIZE_CODE.get(query.size)
+    type_code = TYPE_CODE.get(query.type)
+    if color_code is None or size_code is None or type_code is None:
+        raise HTTPException(status_code=404, detail="Растения не найдены")
+
+    # Готовый ответ по упакованному ключу: без сериализации на горячем пути
+    body = PLANT_RESPONSE_BYTES.get(_pack_key(color_code, size_code, type_code))
+    if body is None:
+        raise HTTPException(status_code=404, detail="Растения не найдены")
+
+    return Response(content=body, media_type="application/json")
+
+@app.post("/find_plants_batch")
+async def find_plants_batch(request: Request):
+    """Пакетный поиск: несколько запросов за один HTTP-вызов, накладные расходы
+    фреймворка оплачиваются один раз на всю пачку."""
+    try:
+        batch = _decode_batch(await request.body())
+    except msgspec.ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except msgspec.DecodeError:
+        raise HTTPException(status_code=400, detail="Некорректный JSON")
+
+    logger.debug("Пакет find_plants_batch от %s: %d запросов",
+                 request.client.host, len(batch.queries))
+
+    # Результаты выровнены по индексу запроса; отсутствие совпадений - пустой список
+    return {"results": [_resolve(q) for q in batch.queries]}
+
+if __name__ == "__main__":
+    import os
+    import uvicorn
+
+    # uvloop и httptools заметно быстрее стандартных event loop и h11;
+    # журнал доступа отключён, чтобы не платить за запись на каждый запрос
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count() or 1,
+        access_log=False
+    )